@@ -54,12 +54,13 @@ uv sync
 
 # Pre-download the embedding model by running a quick test
 echo "Pre-downloading embedding model (this may take a moment)..."
+# Loading through EmbeddingManager downloads the configured model into the
+# same cache directory the plugin reads from
 uv run python -c "
-from fastembed import TextEmbedding
+from claude_reflections.search import EmbeddingManager
 print('Downloading embedding model...')
-model = TextEmbedding('sentence-transformers/all-MiniLM-L6-v2')
 # Generate a test embedding to ensure model is fully loaded
-list(model.embed(['test']))
+EmbeddingManager.embed('test')
 print('Embedding model ready.')
 "
 
@@ -3,18 +3,179 @@
 from __future__ import annotations
 
 import argparse
+import heapq
+import multiprocessing
+import os
 import sys
+from collections import deque
+from collections.abc import Iterable, Iterator
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
 
 from .indexer import (
+    IndexableMessage,
+    count_lines,
     discover_jsonl_files,
     get_final_offset,
     get_project_path,
-    iter_new_messages,
     list_all_projects,
+    read_new_messages,
 )
-from .search import SqliteVecManager
+from .search import EmbeddingManager, SearchResult, SqliteVecManager, embed_query
 from .state import StateManager
 
+# Messages to accumulate before embedding, so small files share ONNX batches
+INDEX_BATCH_SIZE = 512
+
+# Project databases searched concurrently when no project is given
+SEARCH_WORKERS = 8
+
+# Unindexed bytes below which files are parsed inline, since starting parse
+# workers (fresh interpreters) costs more than parsing a few small files
+PARALLEL_PARSE_MIN_BYTES = 16 * 1024 * 1024
+
+# Upper bound on parse worker processes, leaving cores for ONNX inference
+PARSE_WORKERS = 4
+
+# Files submitted to parse workers but not yet indexed
+PARSE_QUEUE_SIZE = 2 * PARSE_WORKERS
+
+
+@dataclass
+class PendingFile:
+    """A JSONL file with unindexed bytes between start_offset and end_offset."""
+
+    path: Path
+    start_offset: int
+    start_line: int | None
+    end_offset: int
+
+
+def find_pending_files(
+    state_mgr: StateManager,
+    project: str,
+    jsonl_files: list[Path],
+    full: bool = False,
+) -> list[PendingFile]:
+    """Get files that have grown since they were last indexed."""
+    state = state_mgr.load(project)
+    pending = []
+    for jsonl_file in jsonl_files:
+        start_line: int | None = 0
+        start_offset = 0
+        file_state = state.files.get(jsonl_file.name)
+        if file_state is not None and not full:
+            start_offset = file_state.last_byte_offset
+            start_line = file_state.last_line_number
+
+        end_offset = get_final_offset(jsonl_file)
+        if start_offset < end_offset:
+            pending.append(PendingFile(jsonl_file, start_offset, start_line, end_offset))
+    return pending
+
+
+def _line_number_at(pending: PendingFile) -> int:
+    """Get the number of lines before end_offset, counting only new bytes if possible."""
+    if pending.start_line is None:
+        return count_lines(pending.path, 0, pending.end_offset)
+    return pending.start_line + count_lines(pending.path, pending.start_offset, pending.end_offset)
+
+
+def _should_parse_in_pool(pending: list[PendingFile]) -> bool:
+    """Check whether there is enough to parse to be worth worker processes."""
+    if len(pending) < 2:
+        return False
+    return sum(p.end_offset - p.start_offset for p in pending) >= PARALLEL_PARSE_MIN_BYTES
+
+
+def parse_pending_files(
+    pending: list[PendingFile],
+    pool: ProcessPoolExecutor | None = None,
+) -> Iterator[tuple[PendingFile, list[IndexableMessage]]]:
+    """Parse pending files in order, in the pool's worker processes if given."""
+    if pool is None:
+        for p in pending:
+            yield p, read_new_messages(p.path, p.start_offset, p.start_line, p.end_offset)
+        return
+
+    # Keep a bounded window of files in flight, submitting the next as each
+    # result is yielded, so parsed messages don't pile up faster than they
+    # are embedded. Results are still yielded in file order.
+    in_flight: deque[tuple[PendingFile, Future[list[IndexableMessage]]]] = deque()
+    for p in pending:
+        in_flight.append(
+            (p, pool.submit(read_new_messages, p.path, p.start_offset, p.start_line, p.end_offset))
+        )
+        if len(in_flight) >= PARSE_QUEUE_SIZE:
+            done, future = in_flight.popleft()
+            yield done, future.result()
+    while in_flight:
+        done, future = in_flight.popleft()
+        yield done, future.result()
+
+
+def index_pending_files(
+    manager: SqliteVecManager,
+    state_mgr: StateManager,
+    project: str,
+    parsed: Iterable[tuple[PendingFile, list[IndexableMessage]]],
+    verbose: bool = False,
+) -> int:
+    """Index parsed files, embedding messages in batches that span files.
+
+    State is saved once for each batch after its messages have been written.
+    Returns the number of messages indexed.
+    """
+    total = 0
+    batch: list[IndexableMessage] = []
+    batch_files: list[tuple[PendingFile, int]] = []
+
+    for pending, messages in parsed:
+        if messages:
+            batch.extend(messages)
+            batch_files.append((pending, len(messages)))
+
+        if len(batch) >= INDEX_BATCH_SIZE:
+            total += _flush_batch(manager, state_mgr, project, batch, batch_files, verbose)
+
+    if batch:
+        total += _flush_batch(manager, state_mgr, project, batch, batch_files, verbose)
+
+    return total
+
+
+def _flush_batch(
+    manager: SqliteVecManager,
+    state_mgr: StateManager,
+    project: str,
+    batch: list[IndexableMessage],
+    batch_files: list[tuple[PendingFile, int]],
+    verbose: bool,
+) -> int:
+    """Index a batch of messages, then record progress for the files it came from."""
+    count = manager.index_messages(batch)
+
+    # Reload rather than holding one state for the whole run, so progress saved
+    # meanwhile by another process (e.g. a search auto-index) isn't overwritten.
+    # The load is served from cache unless state.json changed on disk.
+    state = state_mgr.load(project)
+    for pending, file_count in batch_files:
+        state_mgr.apply_file_delta(
+            state,
+            pending.path.name,
+            pending.end_offset,
+            file_count,
+            _line_number_at(pending),
+        )
+        if verbose:
+            print(f"  Indexed {file_count} messages from {pending.path.name}")
+    state_mgr.save(project, state)
+
+    batch.clear()
+    batch_files.clear()
+    return count
+
 
 def cmd_index(args: argparse.Namespace) -> int:
     """Index conversations for a project."""
@@ -28,53 +189,60 @@ def cmd_index(args: argparse.Namespace) -> int:
 
     total_indexed = 0
 
-    for project in projects:
-        project_path = get_project_path(project)
-
-        if not project_path.exists():
-            print(f"Project directory not found: {project_path}")
-            continue
-
-        jsonl_files = discover_jsonl_files(project_path)
-        if not jsonl_files:
-            continue
-
-        manager = SqliteVecManager(state_mgr.get_db_path(project))
-
-        if args.full:
-            manager.drop_collection()
-            state = state_mgr.load(project)
-            state.files.clear()
-            state_mgr.save(project, state)
-
-        project_indexed = 0
-
-        for jsonl_file in jsonl_files:
-            filename = jsonl_file.name
-
-            # Get starting offset (0 if full reindex)
-            start_offset = 0 if args.full else state_mgr.get_file_offset(project, filename)
+    # JSONL parsing is CPU-bound, so large backlogs are parsed in worker
+    # processes while the main process embeds and inserts earlier files. The
+    # pool is only started once a project has enough to parse, and workers are
+    # spawned rather than forked since the ONNX runtime may already own threads.
+    # Spawned workers start on demand, so parsing two files starts two.
+    pool: ProcessPoolExecutor | None = None
 
-            # Collect new messages
-            messages = list(iter_new_messages(jsonl_file, start_offset))
+    try:
+        for project in projects:
+            project_path = get_project_path(project)
 
-            if messages:
-                # Index to sqlite-vec
-                count = manager.index_messages(messages)
-                project_indexed += count
-                total_indexed += count
+            if not project_path.exists():
+                print(f"Project directory not found: {project_path}")
+                continue
 
-                # Update state
-                final_offset = get_final_offset(jsonl_file)
-                state_mgr.update_file_state(project, filename, final_offset, count)
-
-                if args.verbose:
-                    print(f"  Indexed {count} messages from {filename}")
-
-        manager.close()
-
-        if project_indexed > 0:
-            print(f"Indexed {project_indexed} messages in {project}")
+            jsonl_files = discover_jsonl_files(project_path)
+            if not jsonl_files:
+                continue
+
+            manager = SqliteVecManager(state_mgr.get_db_path(project))
+
+            if args.full:
+                manager.drop_collection()
+                state = state_mgr.load(project)
+                state.files.clear()
+                state_mgr.save(project, state)
+
+            pending = find_pending_files(state_mgr, project, jsonl_files, full=args.full)
+            if pending:
+                EmbeddingManager.prewarm()
+
+            use_pool = _should_parse_in_pool(pending)
+            if use_pool and pool is None:
+                pool = ProcessPoolExecutor(
+                    max_workers=min(os.cpu_count() or 1, PARSE_WORKERS),
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+
+            project_indexed = index_pending_files(
+                manager,
+                state_mgr,
+                project,
+                parse_pending_files(pending, pool if use_pool else None),
+                verbose=args.verbose,
+            )
+            total_indexed += project_indexed
+
+            manager.close()
+
+            if project_indexed > 0:
+                print(f"Indexed {project_indexed} messages in {project}")
+    finally:
+        if pool is not None:
+            pool.shutdown()
 
     print(f"\nTotal indexed: {total_indexed} messages")
     return 0
@@ -94,18 +262,15 @@ def cmd_search(args: argparse.Namespace) -> int:
                 try:
                     manager = SqliteVecManager(state_mgr.get_db_path(args.project))
 
+                    # The query will need the model too, so start loading it
+                    # while pending files are found and parsed
+                    EmbeddingManager.prewarm()
+
                     # Run incremental indexing silently
-                    for jsonl_file in jsonl_files:
-                        filename = jsonl_file.name
-                        start_offset = state_mgr.get_file_offset(args.project, filename)
-                        messages = list(iter_new_messages(jsonl_file, start_offset))
-
-                        if messages:
-                            manager.index_messages(messages)
-                            final_offset = get_final_offset(jsonl_file)
-                            state_mgr.update_file_state(
-                                args.project, filename, final_offset, len(messages)
-                            )
+                    pending = find_pending_files(state_mgr, args.project, jsonl_files)
+                    index_pending_files(
+                        manager, state_mgr, args.project, parse_pending_files(pending)
+                    )
 
                     manager.close()
                 except Exception as e:
@@ -119,19 +284,26 @@ def cmd_search(args: argparse.Namespace) -> int:
         print("No projects indexed. Run 'claude-reflections index' first.")
         return 1
 
-    all_results = []
+    # Embed the query once and search the project databases concurrently;
+    # sqlite releases the GIL while a query runs
+    query_embedding = embed_query(args.query)
 
-    for project in projects:
+    def search_project(project: str) -> list[SearchResult]:
         manager = SqliteVecManager(state_mgr.get_db_path(project))
-        results = manager.search(args.query, limit=args.limit)
-        manager.close()
+        try:
+            return manager.search_with_vector(query_embedding, limit=args.limit)
+        finally:
+            manager.close()
+
+    all_results = []
 
-        for r in results:
-            all_results.append((project, r))
+    with ThreadPoolExecutor(max_workers=min(SEARCH_WORKERS, len(projects))) as executor:
+        for project, results in zip(projects, executor.map(search_project, projects), strict=True):
+            for r in results:
+                all_results.append((project, r))
 
-    # Sort by score
-    all_results.sort(key=lambda x: x[1].score, reverse=True)
-    all_results = all_results[: args.limit]
+    # Keep the top results by score without sorting every hit
+    all_results = heapq.nlargest(args.limit, all_results, key=lambda x: x[1].score)
 
     if not all_results:
         print("No results found.")
@@ -195,7 +367,7 @@ def cmd_list_projects(_args: argparse.Namespace) -> int:
     print("Available projects:\n")
     for project in projects:
         project_path = get_project_path(project)
-        jsonl_count = len(list(project_path.glob("*.jsonl")))
+        jsonl_count = len(discover_jsonl_files(project_path))
         print(f"  {project} ({jsonl_count} files)")
 
     return 0
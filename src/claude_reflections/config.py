@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+import functools
 import json
 import os
 from pathlib import Path
@@ -17,28 +18,84 @@ def get_state_base_dir() -> Path:
     return Path(base_dir)
 
 
+def get_model_cache_dir() -> Path:
+    """Get the directory where FastEmbed model files are kept.
+
+    FastEmbed defaults to the system temp directory, which is often cleared on
+    reboot and forces a fresh model download.
+    """
+    return get_state_base_dir() / "models"
+
+
+def create_temp_file(directory: Path, prefix: str) -> tuple[int, str]:
+    """Create a uniquely named temporary file in directory for writing.
+
+    Unlike tempfile.mkstemp, which always creates files 0600, the file is opened
+    with mode 0666 and the kernel applies the umask, so a file written through it
+    and renamed into place gets the same permissions open() would give it.
+    Returns the open file descriptor and the file's path.
+    """
+    while True:
+        path = str(directory / f"{prefix}{os.urandom(8).hex()}.tmp")
+        try:
+            return os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666), path
+        except FileExistsError:
+            continue
+
+
 def get_config_path() -> Path:
     """Get the path to the config file."""
     return get_state_base_dir() / "config.json"
 
 
+@functools.lru_cache(maxsize=1)
+def _read_config(config_path: Path, mtime_ns: int, size: int) -> dict[str, Any]:
+    """Read and parse the config file, cached on its path and stat signature."""
+    with open(config_path, encoding="utf-8") as f:
+        config: dict[str, Any] = json.load(f)
+    return config
+
+
 def load_config() -> dict[str, Any]:
-    """Load configuration from file."""
+    """Load configuration from file.
+
+    The parsed file is reused until its path, mtime or size changes, so repeated
+    calls within a command only cost a stat.
+    """
     config_path = get_config_path()
-    if config_path.exists():
-        with open(config_path, encoding="utf-8") as f:
-            return json.load(f)
-    return {}
+    try:
+        st = config_path.stat()
+    except FileNotFoundError:
+        return {}
+    return dict(_read_config(config_path, st.st_mtime_ns, st.st_size))
 
 
 def save_config(config: dict[str, Any]) -> None:
-    """Save configuration to file."""
+    """Save configuration to file.
+
+    Written to a temporary sibling and renamed into place, so a crash can't
+    leave a truncated config.json behind.
+    """
     config_path = get_config_path()
     config_path.parent.mkdir(parents=True, exist_ok=True)
-    with open(config_path, "w", encoding="utf-8") as f:
-        json.dump(config, f, indent=2)
+
+    data = json.dumps(config, indent=2).encode()
+    fd, tmp_path = create_temp_file(config_path.parent, ".config.")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, config_path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    finally:
+        _read_config.cache_clear()
+
+
+# Keys written by the old Qdrant-based installer
+_LEGACY_QDRANT_KEYS = frozenset({"qdrant_port", "qdrant_host", "qdrant_container"})
 
 
 def is_legacy_qdrant_config(config: dict[str, Any]) -> bool:
     """Check if config is from an old Qdrant-based install."""
-    return "qdrant_port" in config
+    return not _LEGACY_QDRANT_KEYS.isdisjoint(config)
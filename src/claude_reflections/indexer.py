@@ -3,19 +3,26 @@
 from __future__ import annotations
 
 import json
+import mmap
 import os
 from collections.abc import Iterator
 from dataclasses import dataclass
 from pathlib import Path
 
+# Chunk size when counting lines in JSONL files
+_READ_BUFFER_SIZE = 1024 * 1024
 
-@dataclass
+# Characters of message text kept for embedding; longer content is truncated
+MAX_CONTENT_CHARS = 2000
+
+
+@dataclass(slots=True)
 class IndexableMessage:
     """A message extracted from JSONL ready for indexing."""
 
     uuid: str
     role: str  # "user" or "assistant"
-    content: str
+    content: str  # Truncated to MAX_CONTENT_CHARS
     timestamp: str
     session_id: str
     file_path: str
@@ -36,16 +43,25 @@ def extract_text_content(message_content: str | list[dict]) -> str:
     # Assistant content is an array of blocks
     text_parts: list[str] = []
     for block in message_content:
-        if isinstance(block, dict):
-            block_type = block.get("type", "")
-            # Only extract text blocks, skip thinking and tool_use
-            if block_type == "text":
-                text_parts.append(block.get("text", ""))
+        # Only extract text blocks, skip thinking, tool_use and non-dict entries
+        try:
+            if block["type"] != "text":
+                continue
+        except (TypeError, KeyError):
+            continue
+        text_parts.append(block.get("text", ""))
+
+    # Most replies have a single text block, which needs no joining
+    if len(text_parts) == 1:
+        return text_parts[0]
     return "\n".join(text_parts)
 
 
-def parse_jsonl_line(line: str) -> dict | None:
-    """Parse a single JSONL line, returning None if invalid or skippable."""
+def parse_jsonl_line(line: str | bytes) -> dict | None:
+    """Parse a single JSONL line, returning None if invalid or skippable.
+
+    Raw bytes are parsed directly, skipping a separate UTF-8 decode pass.
+    """
     line = line.strip()
     if not line:
         return None
@@ -54,6 +70,14 @@ def parse_jsonl_line(line: str) -> dict | None:
         data = json.loads(line)
     except json.JSONDecodeError:
         return None
+    except UnicodeDecodeError:
+        # Invalid UTF-8 in raw bytes: retry with a lossy decode
+        if isinstance(line, bytes):
+            return parse_jsonl_line(line.decode("utf-8", errors="replace"))
+        return None
+
+    if not isinstance(data, dict):
+        return None
 
     # Skip non-message types
     msg_type = data.get("type", "")
@@ -63,15 +87,46 @@ def parse_jsonl_line(line: str) -> dict | None:
     return data
 
 
+def count_lines(
+    file_path: str | Path,
+    start_offset: int = 0,
+    end_offset: int | None = None,
+) -> int:
+    """Count newline characters between two byte offsets of a file.
+
+    Reads in large chunks so counting runs at bytes.count speed rather than
+    iterating line by line.
+    """
+    count = 0
+    with open(file_path, "rb", buffering=0) as f:
+        f.seek(start_offset)
+        remaining = None if end_offset is None else end_offset - start_offset
+        while remaining is None or remaining > 0:
+            size = _READ_BUFFER_SIZE if remaining is None else min(_READ_BUFFER_SIZE, remaining)
+            chunk = f.read(size)
+            if not chunk:
+                break
+            count += chunk.count(b"\n")
+            if remaining is not None:
+                remaining -= len(chunk)
+    return count
+
+
 def iter_new_messages(
     file_path: str | Path,
     start_offset: int = 0,
+    start_line: int | None = None,
+    end_offset: int | None = None,
 ) -> Iterator[IndexableMessage]:
     """Iterate over messages in a JSONL file starting from a byte offset.
 
     Args:
         file_path: Path to the JSONL file
         start_offset: Byte offset to start reading from (for incremental indexing)
+        start_line: Number of lines before start_offset, as stored in state.
+            Counted from the start of the file when not provided.
+        end_offset: Byte offset to stop reading at (default: end of file), so
+            callers can record exactly how far they indexed
 
     Yields:
         IndexableMessage for each valid user/assistant message
@@ -79,58 +134,89 @@ def iter_new_messages(
     file_path = Path(file_path)
 
     with open(file_path, "rb") as f:
-        # Seek to start position
-        f.seek(start_offset)
-
-        # If not at start, skip to next line boundary
-        if start_offset > 0:
-            # Read until newline to get to a clean line boundary
-            f.readline()
+        size = os.fstat(f.fileno()).st_size
+        if end_offset is not None:
+            size = min(size, end_offset)
+        if start_offset >= size:
+            # Nothing new (mmap also rejects empty files)
+            return
+
+        # Map the file and find line boundaries with mmap.find, which scans in C
+        # instead of going through readline's per-line buffering
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if hasattr(mmap, "MADV_SEQUENTIAL"):
+                mm.madvise(mmap.MADV_SEQUENTIAL)
+
+            size = min(size, len(mm))
+            pos = start_offset
+            line_number = 0
+            if start_offset > 0:
+                if start_line is None:
+                    start_line = count_lines(file_path, 0, start_offset)
+                line_number = start_line
+
+                # If the offset falls mid-line, skip to the next line boundary
+                if mm[start_offset - 1] != ord("\n"):
+                    end = mm.find(b"\n", start_offset)
+                    pos = size if end == -1 else end + 1
+                    line_number += 1
+
+            # Lines starting before size are read in full, so a line straddling
+            # end_offset is indexed now and skipped as a partial line next time
+            while pos < size:
+                end = mm.find(b"\n", pos)
+                if end == -1:
+                    end = len(mm)
+                byte_offset = pos
+                line_bytes = mm[pos:end]
+                pos = end + 1
 
-        line_number = 0
-        if start_offset > 0:
-            # Count lines up to offset for accurate line numbers
-            f.seek(0)
-            for _ in f:
                 line_number += 1
-                if f.tell() >= start_offset:
-                    break
-            f.seek(start_offset)
-            if start_offset > 0:
-                f.readline()  # Skip partial line
 
-        while True:
-            byte_offset = f.tell()
-            line_bytes = f.readline()
-            if not line_bytes:
-                break
+                # Cheap substring test to skip summary/system/snapshot lines
+                # without a JSON parse. Every message line contains its type as
+                # a quoted string, wherever the "type" key falls in the record.
+                if b'"user"' not in line_bytes and b'"assistant"' not in line_bytes:
+                    continue
 
-            line_number += 1
-            line = line_bytes.decode("utf-8", errors="replace")
-            data = parse_jsonl_line(line)
+                data = parse_jsonl_line(line_bytes)
 
-            if data is None:
-                continue
+                if data is None:
+                    continue
 
-            msg_type = data.get("type", "")
-            message = data.get("message", {})
-            content_raw = message.get("content", "")
+                msg_type = data.get("type", "")
+                message = data.get("message", {})
+                content_raw = message.get("content", "")
 
-            # Extract text content
-            content = extract_text_content(content_raw)
-            if not content.strip():
-                continue
+                # Extract text content
+                content = extract_text_content(content_raw)
+                if not content.strip():
+                    continue
+
+                yield IndexableMessage(
+                    uuid=data.get("uuid", ""),
+                    role=msg_type,
+                    content=content[:MAX_CONTENT_CHARS],
+                    timestamp=data.get("timestamp", ""),
+                    session_id=data.get("sessionId", ""),
+                    file_path=str(file_path),
+                    line_number=line_number,
+                    byte_offset=byte_offset,
+                )
+
+
+def read_new_messages(
+    file_path: str | Path,
+    start_offset: int = 0,
+    start_line: int | None = None,
+    end_offset: int | None = None,
+) -> list[IndexableMessage]:
+    """Collect new messages from a JSONL file into a list.
 
-            yield IndexableMessage(
-                uuid=data.get("uuid", ""),
-                role=msg_type,
-                content=content,
-                timestamp=data.get("timestamp", ""),
-                session_id=data.get("sessionId", ""),
-                file_path=str(file_path),
-                line_number=line_number,
-                byte_offset=byte_offset,
-            )
+    A module-level wrapper around iter_new_messages so it can be dispatched to a
+    process pool.
+    """
+    return list(iter_new_messages(file_path, start_offset, start_line, end_offset))
 
 
 def get_final_offset(file_path: str | Path) -> int:
@@ -141,9 +227,13 @@ def get_final_offset(file_path: str | Path) -> int:
 def discover_jsonl_files(project_dir: str | Path) -> list[Path]:
     """Discover all JSONL files in a project directory."""
     project_dir = Path(project_dir)
-    if not project_dir.exists():
+    try:
+        with os.scandir(project_dir) as it:
+            names = [e.name for e in it if e.name.endswith(".jsonl") and e.is_file()]
+    except OSError:
+        # Missing, not a directory or unreadable, as glob treated them
         return []
-    return sorted(project_dir.glob("*.jsonl"))
+    return [project_dir / name for name in sorted(names)]
 
 
 def get_projects_dir() -> Path:
@@ -154,10 +244,24 @@ def get_projects_dir() -> Path:
 def list_all_projects() -> list[str]:
     """List all project names in the Claude projects directory."""
     projects_dir = get_projects_dir()
-    if not projects_dir.exists():
+    try:
+        with os.scandir(projects_dir) as it:
+            return sorted(e.name for e in it if e.is_dir() and _has_jsonl_file(e.path))
+    except FileNotFoundError:
         return []
 
-    return sorted(d.name for d in projects_dir.iterdir() if d.is_dir() and any(d.glob("*.jsonl")))
+
+def _has_jsonl_file(directory: str) -> bool:
+    """Check for a JSONL file, stopping at the first match.
+
+    An unreadable directory counts as having none, so one bad project can't
+    stop the others from being listed.
+    """
+    try:
+        with os.scandir(directory) as it:
+            return any(e.name.endswith(".jsonl") for e in it)
+    except OSError:
+        return False
 
 
 def get_project_path(project_name: str) -> Path:
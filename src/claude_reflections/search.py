@@ -2,31 +2,113 @@
 
 from __future__ import annotations
 
+import contextlib
+import functools
+import os
 import sqlite3
-import struct
+import threading
+from collections.abc import Iterator
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Any
 
+import numpy as np
 import sqlite_vec
 from fastembed import TextEmbedding
+from numpy.typing import NDArray
 
-from .indexer import IndexableMessage
+from .config import get_model_cache_dir, load_config
+from .indexer import MAX_CONTENT_CHARS, IndexableMessage
 
 # Default embedding model (384 dimensions)
 EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
 EMBEDDING_DIM = 384
 
-# Fixed table name used in every per-project DB
-TABLE_NAME = "vectors"
+# INT8-quantized ONNX model with the same dimension, selectable via config
+QUANTIZED_EMBEDDING_MODEL = "BAAI/bge-small-en-v1.5"
 
+# Texts per ONNX forward pass; MiniLM-L6 throughput peaks around 32-64
+EMBED_BATCH_SIZE = 64
 
-def serialize_f32(v: list[float]) -> bytes:
-    """Serialize a float vector to bytes for sqlite-vec."""
-    return struct.pack(f"{len(v)}f", *v)
+# Distinct search queries whose serialized embeddings are kept in memory
+QUERY_CACHE_SIZE = 1024
 
+# Fixed table name used in every per-project DB
+TABLE_NAME = "vectors"
 
-@dataclass
+# SQL is built once at import; TABLE_NAME and EMBEDDING_DIM never change, and
+# identical strings let sqlite3's statement cache reuse the prepared plans
+_EXISTS_SQL = "SELECT sql FROM sqlite_master WHERE type='table' AND name=?"
+
+_CREATE_SQL = f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS "{TABLE_NAME}" USING vec0(
+        embedding int8[{EMBEDDING_DIM}] distance_metric=cosine,
+        +uuid TEXT,
+        +file_path TEXT,
+        +line_number INTEGER,
+        +role TEXT,
+        +snippet TEXT,
+        +timestamp TEXT,
+        +session_id TEXT
+    )
+"""
+
+_INSERT_SQL = f"""
+    INSERT INTO "{TABLE_NAME}"(
+        embedding, uuid, file_path, line_number,
+        role, snippet, timestamp, session_id
+    ) VALUES ({{vector}}, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+_SEARCH_SQL = f"""
+    SELECT
+        distance,
+        uuid,
+        file_path,
+        line_number,
+        role,
+        snippet,
+        timestamp,
+        session_id
+    FROM "{TABLE_NAME}"
+    WHERE embedding MATCH {{vector}}
+        AND k = ?
+        AND distance <= ?
+    ORDER BY distance
+"""
+
+# int8 blobs must be tagged with vec_int8(); float32 blobs are passed as is
+_INSERT_SQL_I8 = _INSERT_SQL.format(vector="vec_int8(?)")
+_INSERT_SQL_F32 = _INSERT_SQL.format(vector="?")
+_SEARCH_SQL_I8 = _SEARCH_SQL.format(vector="vec_int8(?)")
+_SEARCH_SQL_F32 = _SEARCH_SQL.format(vector="?")
+
+_COUNT_SQL = f'SELECT count(*) FROM "{TABLE_NAME}"'
+_DROP_SQL = f'DROP TABLE IF EXISTS "{TABLE_NAME}"'
+
+
+def serialize_f32(v: list[float] | NDArray[np.float32]) -> bytes:
+    """Serialize a float vector to bytes for sqlite-vec.
+
+    float32 arrays are copied out in one memcpy; lists are converted first.
+    """
+    return np.ascontiguousarray(v, dtype=np.float32).tobytes()
+
+
+def quantize_i8(v: list[float] | NDArray[np.float32]) -> bytes:
+    """Scale a float vector into int8 range and serialize it for sqlite-vec.
+
+    Each vector gets its own scale, which cosine distance ignores, so the full
+    int8 range is used regardless of the vector's magnitude.
+    """
+    a = np.asarray(v, dtype=np.float32)
+    peak = float(np.abs(a).max())
+    if peak > 0:
+        a = a * (127.0 / peak)
+    return np.rint(a).astype(np.int8).tobytes()
+
+
+@dataclass(slots=True)
 class SearchResult:
     """A search result with file reference."""
 
@@ -40,68 +122,162 @@ class SearchResult:
     session_id: str
 
 
+def get_embedding_model_name() -> str:
+    """Get the embedding model, falling back to EMBEDDING_MODEL.
+
+    The REFLECTIONS_EMBEDDING_MODEL environment variable takes precedence over
+    "embedding_model" in config.json. Set either to QUANTIZED_EMBEDDING_MODEL
+    for faster INT8 inference. Vectors from different models are not
+    comparable, so run `claude-reflections index --full` after changing it.
+    """
+    model_name = os.environ.get("REFLECTIONS_EMBEDDING_MODEL") or load_config().get(
+        "embedding_model", EMBEDDING_MODEL
+    )
+    if not isinstance(model_name, str) or not model_name:
+        raise ValueError(f"Invalid embedding_model in config: {model_name!r}")
+
+    for model in TextEmbedding.list_supported_models():
+        if model["model"] == model_name and model["dim"] != EMBEDDING_DIM:
+            raise ValueError(
+                f"Embedding model {model_name} has dimension {model['dim']}, "
+                f"expected {EMBEDDING_DIM}"
+            )
+    return model_name
+
+
 class EmbeddingManager:
     """Manages embedding generation with FastEmbed."""
 
     _instance: TextEmbedding | None = None
+    _instance_lock = threading.Lock()
+    _prewarm_thread: threading.Thread | None = None
 
     @classmethod
     def get_model(cls) -> TextEmbedding:
         """Get or create the embedding model (singleton)."""
         if cls._instance is None:
-            cls._instance = TextEmbedding(model_name=EMBEDDING_MODEL)
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = TextEmbedding(
+                        model_name=get_embedding_model_name(),
+                        # An explicit FASTEMBED_CACHE_PATH still takes precedence
+                        cache_dir=os.environ.get("FASTEMBED_CACHE_PATH")
+                        or str(get_model_cache_dir()),
+                        providers=["CPUExecutionProvider"],
+                    )
         return cls._instance
 
+    @classmethod
+    def prewarm(cls) -> None:
+        """Start loading the model in a background thread.
+
+        ONNX session setup takes around half a second, which can overlap with
+        scanning and parsing JSONL files. Errors are left for the next
+        get_model call to raise.
+        """
+        if cls._instance is not None or cls._prewarm_thread is not None:
+            return
+
+        def load() -> None:
+            with contextlib.suppress(Exception):
+                cls.get_model()
+
+        cls._prewarm_thread = threading.Thread(target=load, daemon=True)
+        cls._prewarm_thread.start()
+
     @classmethod
     def embed(cls, text: str) -> list[float]:
         """Generate embedding for a single text."""
         model = cls.get_model()
-        embeddings = list(model.embed([text]))
-        return embeddings[0].tolist()
+        embedding: list[float] = next(iter(model.embed([text]))).tolist()
+        return embedding
 
     @classmethod
-    def embed_batch(cls, texts: list[str]) -> list[list[float]]:
-        """Generate embeddings for multiple texts."""
+    def embed_batch(cls, texts: list[str]) -> list[NDArray[np.float32]]:
+        """Generate embeddings for multiple texts.
+
+        Vectors are returned as the float32 arrays FastEmbed produces, avoiding a
+        per-element conversion to Python floats.
+        """
+        return list(cls.iter_embed_batch(texts))
+
+    @classmethod
+    def iter_embed_batch(cls, texts: list[str]) -> Iterator[NDArray[np.float32]]:
+        """Yield embeddings as FastEmbed produces them, one ONNX batch at a time."""
         if not texts:
-            return []
+            return
         model = cls.get_model()
-        return [e.tolist() for e in model.embed(texts)]
+        for e in model.embed(texts, batch_size=EMBED_BATCH_SIZE):
+            yield e.astype(np.float32, copy=False)
+
+
+@functools.lru_cache(maxsize=QUERY_CACHE_SIZE)
+def embed_query(query: str) -> bytes:
+    """Embed a search query, returning it serialized for sqlite-vec.
+
+    Cached so repeated searches, or one query run against many projects,
+    only invoke the model once.
+    """
+    return serialize_f32(EmbeddingManager.embed(query))
 
 
 class SqliteVecManager:
-    """Manages sqlite-vec operations for a project."""
+    """Manages sqlite-vec operations for a project.
+
+    The connection is bound to the thread that opens it, so each thread needs
+    its own manager; separate managers on one database are safe under WAL.
+    """
 
     def __init__(self, db_path: str | Path) -> None:
         self.db_path = Path(db_path)
         self._conn: sqlite3.Connection | None = None
+        # Whether the vector table is known to exist, so the sqlite_master lookup
+        # runs at most once per manager rather than on every call
+        self._table_verified = False
+        # New tables store int8 vectors; databases indexed before quantization
+        # keep their float32 column until the next full reindex
+        self._int8 = True
 
     @property
     def conn(self) -> sqlite3.Connection:
         """Get or create the SQLite connection."""
         if self._conn is None:
             self.db_path.parent.mkdir(parents=True, exist_ok=True)
-            self._conn = sqlite3.connect(str(self.db_path))
+            # Autocommit mode; index_messages manages its own transaction
+            self._conn = sqlite3.connect(str(self.db_path), isolation_level=None)
             self._conn.enable_load_extension(True)
             sqlite_vec.load(self._conn)
             self._conn.enable_load_extension(False)
             self._conn.execute("PRAGMA journal_mode=WAL")
             self._conn.execute("PRAGMA busy_timeout=5000")
+            # NORMAL skips the fsync per commit; in WAL mode the database can't
+            # be corrupted, though a power loss may roll back the latest commits
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute("PRAGMA cache_size=-65536")  # 64 MiB, allocated on demand
+            self._conn.execute("PRAGMA temp_store=MEMORY")
+            self._conn.execute("PRAGMA mmap_size=268435456")  # 256 MiB
         return self._conn
 
+    def _table_exists(self) -> bool:
+        """Check whether the vector table exists, caching a positive result."""
+        if not self._table_verified:
+            row = self.conn.execute(_EXISTS_SQL, (TABLE_NAME,)).fetchone()
+            if row is not None:
+                self._table_verified = True
+                self._int8 = "int8[" in row[0]
+        return self._table_verified
+
+    def _encode(self, v: list[float] | NDArray[np.float32]) -> bytes:
+        """Serialize a vector for the table's embedding column type."""
+        return quantize_i8(v) if self._int8 else serialize_f32(v)
+
     def ensure_collection(self) -> None:
         """Create vector table if it doesn't exist."""
-        self.conn.execute(f"""
-            CREATE VIRTUAL TABLE IF NOT EXISTS "{TABLE_NAME}" USING vec0(
-                embedding float[{EMBEDDING_DIM}] distance_metric=cosine,
-                +uuid TEXT,
-                +file_path TEXT,
-                +line_number INTEGER,
-                +role TEXT,
-                +snippet TEXT,
-                +timestamp TEXT,
-                +session_id TEXT
-            )
-        """)
+        if self._table_exists():
+            return
+        self.conn.execute(_CREATE_SQL)
+        self._table_verified = True
+        self._int8 = True
 
     def index_messages(self, messages: list[IndexableMessage]) -> int:
         """Index a batch of messages. Returns count indexed."""
@@ -110,36 +286,59 @@ class SqliteVecManager:
 
         self.ensure_collection()
 
-        # Generate embeddings
-        texts = [msg.content[:2000] for msg in messages]  # Truncate for embedding
-        embeddings = EmbeddingManager.embed_batch(texts)
-
-        # Insert rows
-        for msg, embedding in zip(messages, embeddings, strict=True):
-            snippet = msg.content[:300]
-            if len(msg.content) > 300:
-                snippet += "..."
-
-            self.conn.execute(
-                f"""
-                INSERT INTO "{TABLE_NAME}"(
-                    embedding, uuid, file_path, line_number,
-                    role, snippet, timestamp, session_id
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                """,
-                (
-                    serialize_f32(embedding),
-                    msg.uuid,
-                    msg.file_path,
-                    msg.line_number,
-                    msg.role,
-                    snippet,
-                    msg.timestamp,
-                    msg.session_id,
-                ),
+        # Conversations repeat boilerplate, so messages are grouped by text and
+        # each distinct text is embedded once. Truncation is a no-op for parsed
+        # messages, which are already capped.
+        by_text: dict[str, list[IndexableMessage]] = {}
+        for msg in messages:
+            by_text.setdefault(msg.content[:MAX_CONTENT_CHARS], []).append(msg)
+
+        # FastEmbed pads each ONNX batch to its longest input, so texts are
+        # embedded shortest first to keep similar lengths together
+        unique = sorted(by_text, key=len)
+
+        # The whole batch is embedded before the transaction starts, so the
+        # write lock is held only for the inserts and not for ONNX inference.
+        # A batch of int8 vectors is small enough to hold in memory.
+        rows: list[tuple[bytes, str, str, int, str, str, str, str]] = []
+        embeddings = EmbeddingManager.iter_embed_batch(unique)
+        for text, embedding in zip(unique, embeddings, strict=True):
+            vector = self._encode(embedding)
+            for msg in by_text[text]:
+                content = msg.content
+                snippet = content[:300] + "..." if len(content) > 300 else content
+
+                rows.append(
+                    (
+                        vector,
+                        msg.uuid,
+                        msg.file_path,
+                        msg.line_number,
+                        msg.role,
+                        snippet,
+                        msg.timestamp,
+                        msg.session_id,
+                    )
+                )
+
+        # executemany prepares the INSERT once, inside a single transaction that
+        # rolls back if any insert fails. IMMEDIATE takes the write lock at BEGIN,
+        # so a busy database is reported there, after busy_timeout, rather than
+        # partway through the batch.
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            self.conn.executemany(
+                _INSERT_SQL_I8 if self._int8 else _INSERT_SQL_F32,
+                rows,
             )
+        except BaseException:
+            # SQLite rolls back by itself on some errors (e.g. SQLITE_FULL), and
+            # a second ROLLBACK would raise and hide the original error
+            if self.conn.in_transaction:
+                self.conn.execute("ROLLBACK")
+            raise
+        self.conn.execute("COMMIT")
 
-        self.conn.commit()
         return len(messages)
 
     def search(
@@ -149,71 +348,59 @@ class SqliteVecManager:
         score_threshold: float = 0.3,
     ) -> list[SearchResult]:
         """Search for messages matching a query."""
-        # Check if table exists
-        cursor = self.conn.execute(
-            "SELECT name FROM sqlite_master WHERE type='table' AND name=?",
-            (TABLE_NAME,),
-        )
-        if cursor.fetchone() is None:
+        if not self._table_exists():
             return []
 
-        # Generate query embedding
-        query_embedding = EmbeddingManager.embed(query)
+        return self.search_with_vector(embed_query(query), limit, score_threshold)
 
-        # Search using vec0 MATCH
+    def search_with_vector(
+        self,
+        query_embedding: bytes | list[float] | NDArray[np.float32],
+        limit: int = 5,
+        score_threshold: float = 0.3,
+    ) -> list[SearchResult]:
+        """Search with a precomputed query embedding.
+
+        Lets a query embedded once be run against several project databases.
+        The embedding may already be serialized as float32, as returned by
+        embed_query.
+        """
+        if not self._table_exists():
+            return []
+
+        if isinstance(query_embedding, bytes):
+            query_embedding = np.frombuffer(query_embedding, dtype=np.float32)
+
+        # Search using vec0 MATCH; the score threshold becomes a distance bound
+        # so rows below it are dropped inside SQLite
         rows = self.conn.execute(
-            f"""
-            SELECT
-                distance,
-                uuid,
-                file_path,
-                line_number,
-                role,
-                snippet,
-                timestamp,
-                session_id
-            FROM "{TABLE_NAME}"
-            WHERE embedding MATCH ?
-                AND k = ?
-            """,
-            (serialize_f32(query_embedding), limit),
+            _SEARCH_SQL_I8 if self._int8 else _SEARCH_SQL_F32,
+            (self._encode(query_embedding), limit, 1.0 - score_threshold),
         ).fetchall()
 
-        # Convert to SearchResult, filtering by threshold
-        results: list[SearchResult] = []
-        for row in rows:
-            distance = row[0]
-            similarity = 1.0 - distance
-            if similarity < score_threshold:
-                continue
-            results.append(
-                SearchResult(
-                    uuid=row[1],
-                    file_path=row[2],
-                    line_number=row[3],
-                    role=row[4],
-                    snippet=row[5],
-                    score=similarity,
-                    timestamp=row[6],
-                    session_id=row[7],
-                )
+        return [
+            SearchResult(
+                uuid=row[1],
+                file_path=row[2],
+                line_number=row[3],
+                role=row[4],
+                snippet=row[5],
+                score=1.0 - row[0],
+                timestamp=row[6],
+                session_id=row[7],
             )
-
-        return results
+            for row in rows
+        ]
 
     def get_collection_stats(self) -> dict[str, Any]:
         """Get statistics about the collection."""
-        cursor = self.conn.execute(
-            "SELECT name FROM sqlite_master WHERE type='table' AND name=?",
-            (TABLE_NAME,),
-        )
-        if cursor.fetchone() is None:
+        if not self._table_exists():
             return {
                 "points_count": 0,
                 "status": "not_found",
             }
 
-        count = self.conn.execute(f'SELECT count(*) FROM "{TABLE_NAME}"').fetchone()[0]
+        count = self.conn.execute(_COUNT_SQL).fetchone()[0]
         return {
             "points_count": count,
             "status": "ok",
@@ -221,8 +408,9 @@ class SqliteVecManager:
 
     def drop_collection(self) -> None:
         """Drop the vector table."""
-        self.conn.execute(f'DROP TABLE IF EXISTS "{TABLE_NAME}"')
-        self.conn.commit()
+        self.conn.execute(_DROP_SQL)
+        self._table_verified = False
+        self._int8 = True
 
     def close(self) -> None:
         """Close the database connection."""
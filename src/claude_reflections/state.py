@@ -9,20 +9,25 @@ from datetime import UTC, datetime
 from pathlib import Path
 from typing import Any
 
+from .config import create_temp_file
 
-@dataclass
+
+@dataclass(slots=True)
 class FileState:
     """State for a single JSONL file."""
 
     last_byte_offset: int = 0
     indexed_count: int = 0
     last_indexed: str = ""
+    # Lines before last_byte_offset; None for state written before it was tracked
+    last_line_number: int | None = None
 
     def to_dict(self) -> dict[str, Any]:
         return {
             "last_byte_offset": self.last_byte_offset,
             "indexed_count": self.indexed_count,
             "last_indexed": self.last_indexed,
+            "last_line_number": self.last_line_number,
         }
 
     @classmethod
@@ -31,10 +36,11 @@ class FileState:
             last_byte_offset=data.get("last_byte_offset", 0),
             indexed_count=data.get("indexed_count", 0),
             last_indexed=data.get("last_indexed", ""),
+            last_line_number=data.get("last_line_number"),
         )
 
 
-@dataclass
+@dataclass(slots=True)
 class ProjectState:
     """State for a project's indexing progress."""
 
@@ -68,6 +74,11 @@ class StateManager:
                 os.path.expanduser("~/.claude/reflections"),
             )
         self.base_dir = Path(base_dir)
+        # Loaded state per project with the (inode, mtime_ns, size) it was read
+        # at, so repeat loads skip parsing while changes from other processes are
+        # seen. Every save renames a new file into place, so the inode changes
+        # even when a rewrite lands within the mtime granularity at the same size.
+        self._cache: dict[str, tuple[ProjectState, tuple[int, int, int]]] = {}
 
     def _project_dir(self, project: str) -> Path:
         """Get the state directory for a project."""
@@ -84,26 +95,54 @@ class StateManager:
         return self._project_dir(project) / "vectors.db"
 
     def load(self, project: str) -> ProjectState:
-        """Load state for a project, creating default if not exists."""
+        """Load state for a project, creating default if not exists.
+
+        The returned state is cached and shared between calls until state.json
+        changes on disk, so callers must save any changes they make to it.
+        """
         state_file = self._state_file(project)
 
-        if not state_file.exists():
+        try:
+            st = state_file.stat()
+        except FileNotFoundError:
+            self._cache.pop(project, None)
             # Create default state with collection name
             safe_name = project.replace("/", "-").replace("-", "_").lstrip("_")
             return ProjectState(collection_name=f"reflections_{safe_name}")
 
-        with open(state_file, encoding="utf-8") as f:
-            data = json.load(f)
+        key = (st.st_ino, st.st_mtime_ns, st.st_size)
+        cached = self._cache.get(project)
+        if cached is not None and cached[1] == key:
+            return cached[0]
 
-        return ProjectState.from_dict(data)
+        # json.loads decodes UTF-8 bytes itself, skipping a text-mode read
+        state = ProjectState.from_dict(json.loads(state_file.read_bytes()))
+        self._cache[project] = (state, key)
+        return state
 
     def save(self, project: str, state: ProjectState) -> None:
-        """Save state for a project."""
+        """Save state for a project.
+
+        The file is written to a unique temporary sibling and renamed into place,
+        so readers never see a partial write and concurrent saves can't mix.
+        """
         state_file = self._state_file(project)
         state_file.parent.mkdir(parents=True, exist_ok=True)
 
-        with open(state_file, "w", encoding="utf-8") as f:
-            json.dump(state.to_dict(), f, indent=2)
+        data = json.dumps(state.to_dict(), indent=2).encode()
+        fd, tmp_path = create_temp_file(state_file.parent, ".state.")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, state_file)
+        except BaseException:
+            os.unlink(tmp_path)
+            # The cached state may hold the unsaved changes
+            self._cache.pop(project, None)
+            raise
+
+        st = state_file.stat()
+        self._cache[project] = (state, (st.st_ino, st.st_mtime_ns, st.st_size))
 
     def update_file_state(
         self,
@@ -111,37 +150,52 @@ class StateManager:
         filename: str,
         byte_offset: int,
         new_count: int,
+        line_number: int | None = None,
     ) -> None:
-        """Update the state for a specific file after indexing."""
+        """Update the state for a specific file after indexing.
+
+        A public convenience that loads, updates and saves the state for a single
+        file. Callers updating several files should use apply_file_delta on one
+        loaded state and save it once.
+
+        line_number is the number of lines before byte_offset, letting the next
+        incremental pass resume line numbering without rescanning the file.
+        """
         state = self.load(project)
+        self.apply_file_delta(state, filename, byte_offset, new_count, line_number)
+        self.save(project, state)
+
+    @staticmethod
+    def apply_file_delta(
+        state: ProjectState,
+        filename: str,
+        byte_offset: int,
+        new_count: int,
+        line_number: int | None = None,
+    ) -> None:
+        """Record indexing progress for a file on an already-loaded state.
 
-        if filename not in state.files:
-            state.files[filename] = FileState()
+        Lets callers updating many files load and save the state once instead
+        of once per file, as update_file_state does.
+        """
+        file_state = state.files.get(filename)
+        if file_state is None:
+            file_state = state.files[filename] = FileState()
 
-        file_state = state.files[filename]
         file_state.last_byte_offset = byte_offset
+        file_state.last_line_number = line_number
         file_state.indexed_count += new_count
         file_state.last_indexed = datetime.now(UTC).isoformat()
 
-        self.save(project, state)
-
     def get_file_offset(self, project: str, filename: str) -> int:
         """Get the last indexed byte offset for a file."""
-        state = self.load(project)
-        if filename in state.files:
-            return state.files[filename].last_byte_offset
-        return 0
+        file_state = self.load(project).files.get(filename)
+        return 0 if file_state is None else file_state.last_byte_offset
 
     def list_projects(self) -> list[str]:
         """List all projects with state files."""
-        if not self.base_dir.exists():
-            return []
-
-        projects = []
-        for item in self.base_dir.iterdir():
-            if item.is_dir() and (item / "state.json").exists():
-                projects.append(item.name)
-        return sorted(projects)
+        # A missing base directory simply matches nothing
+        return sorted(p.parent.name for p in self.base_dir.glob("*/state.json"))
 
     def get_stats(self, project: str) -> dict[str, Any]:
         """Get statistics for a project."""
@@ -0,0 +1,381 @@
+"""Tests for CLI indexing orchestration."""
+
+from __future__ import annotations
+
+import argparse
+import json
+import multiprocessing
+from collections.abc import Generator
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from claude_reflections import cli
+from claude_reflections.cli import (
+    PendingFile,
+    _line_number_at,
+    cmd_index,
+    find_pending_files,
+    index_pending_files,
+    parse_pending_files,
+)
+from claude_reflections.indexer import IndexableMessage, read_new_messages
+from claude_reflections.search import SqliteVecManager
+from claude_reflections.state import FileState, ProjectState, StateManager
+
+PROJECT = "-home-user-project"
+
+
+def _append_messages(path: Path, prefix: str, count: int) -> None:
+    """Append user messages, each preceded by a snapshot line, to a JSONL file."""
+    with open(path, "a") as f:
+        for i in range(count):
+            f.write(json.dumps({"type": "file-history-snapshot", "snapshot": {}}) + "\n")
+            message = {
+                "type": "user",
+                "uuid": f"{prefix}-{i:03d}",
+                "message": {"role": "user", "content": f"Message {i} about {prefix}"},
+                "timestamp": "2025-01-15T10:00:00Z",
+                "sessionId": "session-cli",
+            }
+            f.write(json.dumps(message) + "\n")
+
+
+def _index(manager: SqliteVecManager, state_mgr: StateManager, files: list[Path]) -> int:
+    """Run an incremental index over files, parsing inline."""
+    pending = find_pending_files(state_mgr, PROJECT, files)
+    return index_pending_files(manager, state_mgr, PROJECT, parse_pending_files(pending))
+
+
+def _saved_files(state_dir: Path) -> dict[str, dict]:
+    """Read the per-file entries straight from state.json."""
+    state_file = state_dir / PROJECT.lstrip("-") / "state.json"
+    files: dict[str, dict] = json.loads(state_file.read_text())["files"]
+    return files
+
+
+@pytest.fixture
+def manager(tmp_path: Path) -> Generator[SqliteVecManager, None, None]:
+    """A vector database in a temporary directory."""
+    manager = SqliteVecManager(tmp_path / "vectors.db")
+    yield manager
+    manager.close()
+
+
+@pytest.fixture
+def conversations(tmp_path: Path) -> list[Path]:
+    """Three conversation files with 1, 3 and 2 messages."""
+    project_dir = tmp_path / "projects" / PROJECT
+    project_dir.mkdir(parents=True)
+    files = []
+    for name, count in (("a", 1), ("b", 3), ("c", 2)):
+        path = project_dir / f"{name}.jsonl"
+        _append_messages(path, name, count)
+        files.append(path)
+    return files
+
+
+class TestFindPendingFiles:
+    """Tests for find_pending_files and _line_number_at."""
+
+    def test_new_files_start_at_zero(self, state_dir: Path, conversations: list[Path]) -> None:
+        """Untracked files should be read from the start, up to their current size."""
+        pending = find_pending_files(StateManager(state_dir), PROJECT, conversations)
+
+        assert [p.path for p in pending] == conversations
+        for p in pending:
+            assert (p.start_offset, p.start_line) == (0, 0)
+            assert p.end_offset == p.path.stat().st_size
+
+    def test_resumes_from_state(self, state_dir: Path, conversations: list[Path]) -> None:
+        """Tracked files resume from their offset; fully indexed ones are skipped."""
+        state_mgr = StateManager(state_dir)
+        a, b, _ = conversations
+        a_size = a.stat().st_size
+        b_size = b.stat().st_size
+        state_mgr.update_file_state(PROJECT, a.name, a_size, 1, line_number=2)
+        state_mgr.update_file_state(PROJECT, b.name, 10, 1, line_number=1)
+
+        pending = find_pending_files(state_mgr, PROJECT, conversations)
+
+        assert [p.path.name for p in pending] == ["b.jsonl", "c.jsonl"]
+        assert (pending[0].start_offset, pending[0].start_line) == (10, 1)
+        assert pending[0].end_offset == b_size
+
+    def test_full_ignores_state(self, state_dir: Path, conversations: list[Path]) -> None:
+        """A full reindex should read every file from the start regardless of state."""
+        state_mgr = StateManager(state_dir)
+        for path in conversations:
+            state_mgr.update_file_state(PROJECT, path.name, path.stat().st_size, 1, 2)
+
+        assert find_pending_files(state_mgr, PROJECT, conversations) == []
+
+        pending = find_pending_files(state_mgr, PROJECT, conversations, full=True)
+        assert [p.path for p in pending] == conversations
+        assert all((p.start_offset, p.start_line) == (0, 0) for p in pending)
+
+    def test_legacy_state_counts_lines(self, state_dir: Path, conversations: list[Path]) -> None:
+        """State without a line number should fall back to counting from the start."""
+        state_mgr = StateManager(state_dir)
+        b = conversations[1]
+        offset = len(b.read_bytes().splitlines(keepends=True)[0])
+        legacy = ProjectState(
+            collection_name="reflections_legacy",
+            files={b.name: FileState(last_byte_offset=offset, indexed_count=0)},
+        )
+        state_mgr.save(PROJECT, legacy)
+
+        pending = find_pending_files(state_mgr, PROJECT, [b])
+        assert pending[0].start_line is None
+        assert _line_number_at(pending[0]) == 6
+
+        messages = read_new_messages(b, offset, None, pending[0].end_offset)
+        assert [m.line_number for m in messages] == [2, 4, 6]
+
+    def test_line_number_counts_only_new_bytes(self, conversations: list[Path]) -> None:
+        """With a known start line, only lines after the start offset are counted."""
+        b = conversations[1]
+        first_line = len(b.read_bytes().splitlines(keepends=True)[0])
+        pending = PendingFile(b, first_line, 100, b.stat().st_size)
+        assert _line_number_at(pending) == 105
+
+    def test_end_offset_fixed_before_parsing(
+        self,
+        manager: SqliteVecManager,
+        state_dir: Path,
+        conversations: list[Path],
+    ) -> None:
+        """Lines appended after the pending scan should wait for the next run."""
+        state_mgr = StateManager(state_dir)
+        c = conversations[2]
+        pending = find_pending_files(state_mgr, PROJECT, [c])
+        _append_messages(c, "late", 1)
+
+        parsed = parse_pending_files(pending)
+        assert index_pending_files(manager, state_mgr, PROJECT, parsed) == 2
+        assert _saved_files(state_dir)["c.jsonl"]["last_byte_offset"] == pending[0].end_offset
+        assert _saved_files(state_dir)["c.jsonl"]["last_line_number"] == 4
+
+        assert _index(manager, state_mgr, [c]) == 1
+        assert _saved_files(state_dir)["c.jsonl"]["last_line_number"] == 6
+
+
+class TestIndexPendingFiles:
+    """Tests for index_pending_files."""
+
+    def test_batches_span_files(
+        self,
+        manager: SqliteVecManager,
+        state_dir: Path,
+        conversations: list[Path],
+    ) -> None:
+        """Files should share batches, and each should be recorded once indexed."""
+        state_mgr = StateManager(state_dir)
+        index_messages = manager.index_messages
+        batch_sizes = []
+
+        def record_batch(messages: list[IndexableMessage]) -> int:
+            batch_sizes.append(len(messages))
+            return index_messages(messages)
+
+        with (
+            patch.object(cli, "INDEX_BATCH_SIZE", 2),
+            patch.object(manager, "index_messages", side_effect=record_batch),
+        ):
+            assert _index(manager, state_mgr, conversations) == 6
+
+        # a+b fill the first batch, c the second
+        assert batch_sizes == [4, 2]
+        assert manager.get_collection_stats()["points_count"] == 6
+
+        files = _saved_files(state_dir)
+        for path, count in zip(conversations, (1, 3, 2), strict=True):
+            assert files[path.name]["last_byte_offset"] == path.stat().st_size
+            assert files[path.name]["last_line_number"] == 2 * count
+            assert files[path.name]["indexed_count"] == count
+
+    def test_unflushed_files_stay_pending(
+        self,
+        manager: SqliteVecManager,
+        state_dir: Path,
+        conversations: list[Path],
+    ) -> None:
+        """A failed batch shouldn't mark its files done, so a rerun picks them up."""
+        state_mgr = StateManager(state_dir)
+        index_messages = manager.index_messages
+        calls = 0
+
+        def fail_second_batch(messages: list[IndexableMessage]) -> int:
+            nonlocal calls
+            calls += 1
+            if calls == 2:
+                raise RuntimeError("embedding failed")
+            return index_messages(messages)
+
+        with (
+            patch.object(cli, "INDEX_BATCH_SIZE", 2),
+            patch.object(manager, "index_messages", side_effect=fail_second_batch),
+            pytest.raises(RuntimeError),
+        ):
+            _index(manager, state_mgr, conversations)
+
+        assert sorted(_saved_files(state_dir)) == ["a.jsonl", "b.jsonl"]
+        assert manager.get_collection_stats()["points_count"] == 4
+
+        with patch.object(cli, "INDEX_BATCH_SIZE", 2):
+            assert _index(manager, state_mgr, conversations) == 2
+
+        assert manager.get_collection_stats()["points_count"] == 6
+        assert _saved_files(state_dir)["c.jsonl"]["indexed_count"] == 2
+
+    def test_incremental_append(
+        self,
+        manager: SqliteVecManager,
+        state_dir: Path,
+        conversations: list[Path],
+    ) -> None:
+        """Appended messages should be indexed once, continuing offsets and lines."""
+        state_mgr = StateManager(state_dir)
+        assert _index(manager, state_mgr, conversations) == 6
+        assert _index(manager, state_mgr, conversations) == 0
+
+        _append_messages(conversations[1], "b-more", 2)
+        with patch.object(cli, "INDEX_BATCH_SIZE", 1):
+            assert _index(manager, state_mgr, conversations) == 2
+
+        entry = _saved_files(state_dir)["b.jsonl"]
+        assert entry["last_byte_offset"] == conversations[1].stat().st_size
+        assert entry["last_line_number"] == 10
+        assert entry["indexed_count"] == 5
+        assert manager.get_collection_stats()["points_count"] == 8
+
+        results = manager.search("Message 1 about b-more", limit=1)
+        assert results[0].uuid == "b-more-001"
+        assert results[0].line_number == 10
+
+    def test_keeps_progress_saved_meanwhile(
+        self,
+        manager: SqliteVecManager,
+        state_dir: Path,
+        conversations: list[Path],
+    ) -> None:
+        """State saved by another process mid-run shouldn't be overwritten."""
+        state_mgr = StateManager(state_dir)
+        index_messages = manager.index_messages
+
+        def index_with_concurrent_save(messages: list[IndexableMessage]) -> int:
+            # Another process, e.g. a search auto-index, records a file meanwhile
+            StateManager(state_dir).update_file_state(PROJECT, "other.jsonl", 123, 4)
+            return index_messages(messages)
+
+        with (
+            patch.object(cli, "INDEX_BATCH_SIZE", 2),
+            patch.object(manager, "index_messages", side_effect=index_with_concurrent_save),
+        ):
+            _index(manager, state_mgr, conversations)
+
+        files = _saved_files(state_dir)
+        assert files["other.jsonl"]["last_byte_offset"] == 123
+        assert sorted(files) == ["a.jsonl", "b.jsonl", "c.jsonl", "other.jsonl"]
+
+
+class TestParsePendingFiles:
+    """Tests for parse_pending_files and the parse pool in cmd_index."""
+
+    def test_pool_matches_inline(self, state_dir: Path, conversations: list[Path]) -> None:
+        """Parsing in worker processes should yield the same files and messages in order."""
+        pending = find_pending_files(StateManager(state_dir), PROJECT, conversations)
+        inline = list(parse_pending_files(pending))
+
+        pool = ProcessPoolExecutor(max_workers=2, mp_context=multiprocessing.get_context("spawn"))
+        with pool:
+            pooled = list(parse_pending_files(pending, pool))
+
+        assert pooled == inline
+        assert [len(messages) for _, messages in pooled] == [1, 3, 2]
+
+    def test_pool_bounds_files_in_flight(
+        self,
+        state_dir: Path,
+        conversations: list[Path],
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        """Files should only be submitted as earlier results are consumed."""
+        monkeypatch.setattr(cli, "PARSE_QUEUE_SIZE", 2)
+        pending = find_pending_files(StateManager(state_dir), PROJECT, conversations)
+
+        pool = ProcessPoolExecutor(max_workers=2, mp_context=multiprocessing.get_context("spawn"))
+        with pool, patch.object(pool, "submit", wraps=pool.submit) as submit:
+            parsed = parse_pending_files(pending, pool)
+            first, _ = next(parsed)
+            assert first is pending[0]
+            assert submit.call_count == 2
+
+            assert [p for p, _ in parsed] == pending[1:]
+            assert submit.call_count == 3
+
+    def test_cmd_index_parses_small_backlog_inline(
+        self,
+        state_dir: Path,
+        conversations: list[Path],
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        """A small incremental index shouldn't start any worker processes."""
+        monkeypatch.setenv("REFLECTIONS_STATE_DIR", str(state_dir))
+        monkeypatch.setattr(cli, "get_project_path", lambda _project: conversations[0].parent)
+        args = argparse.Namespace(project=PROJECT, full=False, verbose=False)
+
+        with patch.object(cli, "ProcessPoolExecutor") as pool_cls:
+            assert cmd_index(args) == 0
+
+        pool_cls.assert_not_called()
+        assert sorted(_saved_files(state_dir)) == ["a.jsonl", "b.jsonl", "c.jsonl"]
+
+    def test_cmd_index_parses_large_backlog_in_pool(
+        self,
+        state_dir: Path,
+        conversations: list[Path],
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        """Above the size threshold, files are parsed in the pool and then indexed."""
+        monkeypatch.setenv("REFLECTIONS_STATE_DIR", str(state_dir))
+        monkeypatch.setattr(cli, "get_project_path", lambda _project: conversations[0].parent)
+        monkeypatch.setattr(cli, "PARALLEL_PARSE_MIN_BYTES", 0)
+        args = argparse.Namespace(project=PROJECT, full=False, verbose=False)
+
+        with patch.object(cli, "ProcessPoolExecutor", wraps=ProcessPoolExecutor) as pool_cls:
+            assert cmd_index(args) == 0
+
+        pool_cls.assert_called_once()
+        assert pool_cls.call_args.kwargs["max_workers"] <= cli.PARSE_WORKERS
+
+        files = _saved_files(state_dir)
+        for path, count in zip(conversations, (1, 3, 2), strict=True):
+            assert files[path.name]["last_byte_offset"] == path.stat().st_size
+            assert files[path.name]["indexed_count"] == count
+
+        manager = SqliteVecManager(StateManager(state_dir).get_db_path(PROJECT))
+        assert manager.get_collection_stats()["points_count"] == 6
+        manager.close()
+
+
+class TestCmdSearch:
+    """Tests for cmd_search."""
+
+    def test_no_projects_skips_model_load(
+        self,
+        state_dir: Path,
+        monkeypatch: pytest.MonkeyPatch,
+        capsys: pytest.CaptureFixture[str],
+    ) -> None:
+        """With nothing indexed, search should return without loading the model."""
+        monkeypatch.setenv("REFLECTIONS_STATE_DIR", str(state_dir))
+        args = argparse.Namespace(query="docker", project=None, limit=5)
+
+        with patch.object(cli.EmbeddingManager, "prewarm") as prewarm:
+            assert cli.cmd_search(args) == 1
+
+        prewarm.assert_not_called()
+        assert "No projects indexed" in capsys.readouterr().out
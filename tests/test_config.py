@@ -9,6 +9,7 @@ from unittest.mock import patch
 
 from claude_reflections.config import (
     get_config_path,
+    get_model_cache_dir,
     get_state_base_dir,
     is_legacy_qdrant_config,
     load_config,
@@ -50,6 +51,15 @@ class TestConfigPath:
             assert path == tmp_path / "config.json"
 
 
+class TestModelCacheDir:
+    """Tests for get_model_cache_dir."""
+
+    def test_under_state_dir(self, tmp_path: Path) -> None:
+        """Model files should live alongside the rest of the state."""
+        with patch.dict(os.environ, {"REFLECTIONS_STATE_DIR": str(tmp_path)}):
+            assert get_model_cache_dir() == tmp_path / "models"
+
+
 class TestLoadConfig:
     """Tests for load_config function."""
 
@@ -68,6 +78,22 @@ class TestLoadConfig:
             config = load_config()
             assert config == {}
 
+    def test_reload_after_save(self, tmp_path: Path) -> None:
+        """Should return the new contents after save_config."""
+        with patch.dict(os.environ, {"REFLECTIONS_STATE_DIR": str(tmp_path)}):
+            save_config({"version": 1})
+            assert load_config()["version"] == 1
+            save_config({"version": 2})
+            assert load_config()["version"] == 2
+
+    def test_returns_independent_copies(self, tmp_path: Path) -> None:
+        """Mutating a loaded config should not affect later loads."""
+        (tmp_path / "config.json").write_text(json.dumps({"version": 2}))
+
+        with patch.dict(os.environ, {"REFLECTIONS_STATE_DIR": str(tmp_path)}):
+            load_config()["version"] = 99
+            assert load_config()["version"] == 2
+
 
 class TestSaveConfig:
     """Tests for save_config function."""
@@ -95,6 +121,35 @@ class TestSaveConfig:
             data = json.loads(config_file.read_text())
             assert data["version"] == 2
 
+    def test_save_leaves_no_temp_files(self, tmp_path: Path) -> None:
+        """Should leave only config.json behind after saving."""
+        with patch.dict(os.environ, {"REFLECTIONS_STATE_DIR": str(tmp_path)}):
+            save_config({"version": 1})
+            save_config({"version": 2})
+
+        assert [p.name for p in tmp_path.iterdir()] == ["config.json"]
+
+    def test_save_uses_umask_mode(self, tmp_path: Path) -> None:
+        """Should give config.json the usual umask-derived mode, not 0600."""
+        old_umask = os.umask(0o022)
+        try:
+            with patch.dict(os.environ, {"REFLECTIONS_STATE_DIR": str(tmp_path)}):
+                save_config({"version": 1})
+        finally:
+            os.umask(old_umask)
+
+        assert (tmp_path / "config.json").stat().st_mode & 0o777 == 0o644
+
+    def test_save_leaves_umask_alone(self, tmp_path: Path) -> None:
+        """Saving shouldn't change the process umask, which other threads share."""
+        with (
+            patch.dict(os.environ, {"REFLECTIONS_STATE_DIR": str(tmp_path)}),
+            patch("os.umask") as umask,
+        ):
+            save_config({"version": 1})
+
+        umask.assert_not_called()
+
 
 class TestLegacyDetection:
     """Tests for legacy Qdrant config detection."""
@@ -116,3 +171,7 @@ class TestLegacyDetection:
     def test_empty_config(self) -> None:
         """Should not flag empty config."""
         assert is_legacy_qdrant_config({}) is False
+
+    def test_detects_partial_qdrant_config(self) -> None:
+        """Any one of the old Qdrant keys marks a legacy config."""
+        assert is_legacy_qdrant_config({"qdrant_host": "localhost"}) is True
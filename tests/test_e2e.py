@@ -21,7 +21,7 @@ from claude_reflections.state import StateManager
 pytestmark = pytest.mark.e2e
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def sample_conversation() -> str:
     """Sample JSONL conversation data."""
     messages = [
@@ -2,13 +2,21 @@
 
 from __future__ import annotations
 
+import json
+import os
 from pathlib import Path
+from typing import Any
+from unittest.mock import patch
 
 from claude_reflections.indexer import (
+    MAX_CONTENT_CHARS,
+    count_lines,
     discover_jsonl_files,
     extract_text_content,
     iter_new_messages,
+    list_all_projects,
     parse_jsonl_line,
+    read_new_messages,
 )
 
 
@@ -56,6 +64,15 @@ class TestExtractTextContent:
         result = extract_text_content(content)
         assert result == "First part.\nSecond part."
 
+    def test_skips_malformed_blocks(self) -> None:
+        """Non-dict blocks and blocks without a type are ignored."""
+        content = [
+            "stray string",
+            {"text": "no type"},
+            {"type": "text", "text": "Kept."},
+        ]
+        assert extract_text_content(content) == "Kept."
+
 
 class TestParseJsonlLine:
     """Tests for parse_jsonl_line function."""
@@ -93,6 +110,24 @@ class TestParseJsonlLine:
         result = parse_jsonl_line("")
         assert result is None
 
+    def test_bytes_line(self) -> None:
+        """Raw bytes are parsed without decoding first."""
+        line = b'{"type": "user", "uuid": "123", "message": {"content": "Hi"}}\n'
+        result = parse_jsonl_line(line)
+        assert result is not None
+        assert result["uuid"] == "123"
+
+    def test_invalid_utf8_bytes(self) -> None:
+        """Invalid UTF-8 is replaced rather than dropping the line."""
+        line = b'{"type": "user", "message": {"content": "caf\xe9"}}'
+        result = parse_jsonl_line(line)
+        assert result is not None
+        assert result["message"]["content"] == "caf\ufffd"
+
+    def test_non_object_json(self) -> None:
+        """Valid JSON that isn't an object should return None."""
+        assert parse_jsonl_line("[1, 2, 3]") is None
+
 
 class TestIterNewMessages:
     """Tests for iter_new_messages function."""
@@ -128,6 +163,64 @@ class TestIterNewMessages:
             )
             assert len(messages_from_offset) < len(all_messages)
 
+    def test_offset_at_line_boundary(self, sample_jsonl_file: Path) -> None:
+        """An offset at the start of a line should not skip that line."""
+        all_messages = list(iter_new_messages(sample_jsonl_file))
+        last = all_messages[-1]
+
+        messages = list(iter_new_messages(sample_jsonl_file, start_offset=last.byte_offset))
+        assert [m.uuid for m in messages] == [last.uuid]
+        assert messages[0].line_number == last.line_number
+
+    def test_start_line_resumes_numbering(self, sample_jsonl_file: Path) -> None:
+        """A stored line count should give the same numbers as counting."""
+        last = list(iter_new_messages(sample_jsonl_file))[-1]
+        start_line = count_lines(sample_jsonl_file, 0, last.byte_offset)
+
+        messages = list(
+            iter_new_messages(sample_jsonl_file, last.byte_offset, start_line=start_line)
+        )
+        assert messages[0].line_number == last.line_number
+
+    def test_empty_file(self, temp_dir: Path) -> None:
+        """Empty files and offsets at EOF yield nothing."""
+        path = temp_dir / "empty.jsonl"
+        path.write_bytes(b"")
+        assert list(iter_new_messages(path)) == []
+
+    def test_offset_at_eof(self, sample_jsonl_file: Path) -> None:
+        """An offset at the end of the file yields nothing."""
+        size = sample_jsonl_file.stat().st_size
+        assert list(iter_new_messages(sample_jsonl_file, start_offset=size)) == []
+
+    def test_end_offset(self, sample_jsonl_file: Path) -> None:
+        """Lines starting at or after end_offset are not read."""
+        all_messages = list(iter_new_messages(sample_jsonl_file))
+        last = all_messages[-1]
+
+        messages = list(iter_new_messages(sample_jsonl_file, end_offset=last.byte_offset))
+        assert messages == all_messages[:-1]
+
+    def test_type_key_after_content(self, temp_dir: Path) -> None:
+        """Lines should be found whatever the key order or spacing."""
+        jsonl_file = temp_dir / "order.jsonl"
+        jsonl_file.write_text(
+            '{"message":{"content":"late type"},"uuid":"u1","type":"user"}\n'
+            '{"type":"summary","summary":"not a message"}\n'
+        )
+        messages = list(iter_new_messages(jsonl_file))
+        assert [m.uuid for m in messages] == ["u1"]
+        assert messages[0].line_number == 1
+
+    def test_long_content_truncated(self, temp_dir: Path) -> None:
+        """Message content should be capped at MAX_CONTENT_CHARS."""
+        jsonl_file = temp_dir / "long.jsonl"
+        line = {"type": "user", "uuid": "u1", "message": {"content": "x" * 5000}}
+        jsonl_file.write_text(json.dumps(line) + "\n")
+
+        messages = list(iter_new_messages(jsonl_file))
+        assert messages[0].content == "x" * MAX_CONTENT_CHARS
+
     def test_message_has_file_info(self, sample_jsonl_file: Path) -> None:
         """Messages should have file path and line number."""
         messages = list(iter_new_messages(sample_jsonl_file))
@@ -139,6 +232,39 @@ class TestIterNewMessages:
         assert msg.byte_offset >= 0
 
 
+class TestCountLines:
+    """Tests for count_lines function."""
+
+    def test_whole_file(self, temp_dir: Path) -> None:
+        """Should count newlines in the whole file."""
+        path = temp_dir / "lines.jsonl"
+        path.write_bytes(b"a\nb\nc")
+        assert count_lines(path) == 2
+
+    def test_range(self, temp_dir: Path) -> None:
+        """Should only count newlines inside the byte range."""
+        path = temp_dir / "lines.jsonl"
+        path.write_bytes(b"a\nb\nc\n")
+        assert count_lines(path, 0, 2) == 1
+        assert count_lines(path, 2, 6) == 2
+
+
+class TestReadNewMessages:
+    """Tests for read_new_messages function."""
+
+    def test_matches_iterator(self, sample_jsonl_file: Path) -> None:
+        """Should return the same messages as iter_new_messages."""
+        messages = read_new_messages(sample_jsonl_file)
+        assert messages == list(iter_new_messages(sample_jsonl_file))
+
+    def test_is_picklable(self, sample_jsonl_file: Path) -> None:
+        """Results must survive the round trip from a worker process."""
+        import pickle
+
+        messages = read_new_messages(sample_jsonl_file)
+        assert pickle.loads(pickle.dumps(messages)) == messages
+
+
 class TestDiscoverJsonlFiles:
     """Tests for discover_jsonl_files function."""
 
@@ -157,3 +283,55 @@ class TestDiscoverJsonlFiles:
         """Files should be sorted."""
         files = discover_jsonl_files(sample_project_dir)
         assert files == sorted(files)
+
+    def test_skips_other_entries(self, temp_dir: Path) -> None:
+        """Should ignore non-JSONL files and directories."""
+        (temp_dir / "b.jsonl").write_text("")
+        (temp_dir / "a.jsonl").write_text("")
+        (temp_dir / "notes.txt").write_text("")
+        (temp_dir / "dir.jsonl").mkdir()
+
+        files = discover_jsonl_files(temp_dir)
+        assert files == [temp_dir / "a.jsonl", temp_dir / "b.jsonl"]
+
+
+class TestListAllProjects:
+    """Tests for list_all_projects function."""
+
+    def test_lists_projects_with_jsonl(self, temp_dir: Path) -> None:
+        """Should list only directories containing JSONL files, sorted."""
+        for name in ("-proj-b", "-proj-a", "-empty"):
+            (temp_dir / name).mkdir()
+        (temp_dir / "-proj-b" / "s.jsonl").write_text("")
+        (temp_dir / "-proj-a" / "s.jsonl").write_text("")
+        (temp_dir / "-empty" / "notes.txt").write_text("")
+        (temp_dir / "stray.jsonl").write_text("")
+
+        with patch("claude_reflections.indexer.get_projects_dir", return_value=temp_dir):
+            assert list_all_projects() == ["-proj-a", "-proj-b"]
+
+    def test_missing_projects_dir(self, temp_dir: Path) -> None:
+        """Should return empty list when the projects directory is missing."""
+        missing = temp_dir / "missing"
+        with patch("claude_reflections.indexer.get_projects_dir", return_value=missing):
+            assert list_all_projects() == []
+
+    def test_skips_unreadable_project(self, temp_dir: Path) -> None:
+        """An unreadable project directory should be skipped, not abort the listing."""
+        for name in ("-locked", "-proj"):
+            (temp_dir / name).mkdir()
+            (temp_dir / name / "s.jsonl").write_text("")
+
+        real_scandir = os.scandir
+        locked = str(temp_dir / "-locked")
+
+        def scandir(path: str) -> Any:
+            if str(path) == locked:
+                raise PermissionError(13, "Permission denied", path)
+            return real_scandir(path)
+
+        with (
+            patch("claude_reflections.indexer.get_projects_dir", return_value=temp_dir),
+            patch("os.scandir", side_effect=scandir),
+        ):
+            assert list_all_projects() == ["-proj"]
@@ -2,10 +2,36 @@
 
 from __future__ import annotations
 
+import json
+import os
+import sqlite3
+import struct
+from collections.abc import Iterator
 from pathlib import Path
+from unittest.mock import patch
+
+import numpy as np
+import pytest
 
 from claude_reflections.indexer import IndexableMessage
-from claude_reflections.search import EmbeddingManager, SearchResult, SqliteVecManager
+from claude_reflections.search import (
+    EMBEDDING_MODEL,
+    QUANTIZED_EMBEDDING_MODEL,
+    EmbeddingManager,
+    SearchResult,
+    SqliteVecManager,
+    embed_query,
+    get_embedding_model_name,
+    quantize_i8,
+    serialize_f32,
+)
+
+
+def _cosine_similarity(a: list[float], b: list[float]) -> float:
+    """Compute the cosine similarity of two embeddings."""
+    va = np.asarray(a, dtype=np.float32)
+    vb = np.asarray(b, dtype=np.float32)
+    return float(va @ vb / (np.linalg.norm(va) * np.linalg.norm(vb)))
 
 
 class TestEmbeddingManager:
@@ -33,16 +59,32 @@ class TestEmbeddingManager:
         embeddings = EmbeddingManager.embed_batch([])
         assert embeddings == []
 
+    def test_iter_embed_batch(self) -> None:
+        """Streamed embeddings should match the batch result."""
+        texts = ["First text", "Second text"]
+        streamed = list(EmbeddingManager.iter_embed_batch(texts))
+        batched = EmbeddingManager.embed_batch(texts)
+
+        assert len(streamed) == 2
+        assert all((a == b).all() for a, b in zip(streamed, batched, strict=True))
+
+    def test_prewarm_loads_model(self) -> None:
+        """prewarm should load the model in the background, once."""
+        with (
+            patch.object(EmbeddingManager, "_instance", None),
+            patch.object(EmbeddingManager, "_prewarm_thread", None),
+        ):
+            EmbeddingManager.prewarm()
+            thread = EmbeddingManager._prewarm_thread
+            assert thread is not None
+            EmbeddingManager.prewarm()
+            assert EmbeddingManager._prewarm_thread is thread
+
+            thread.join()
+            assert EmbeddingManager._instance is not None
+
     def test_similar_texts_have_similar_embeddings(self) -> None:
         """Similar texts should have similar embeddings."""
-        import math
-
-        def cosine_similarity(a: list[float], b: list[float]) -> float:
-            dot_product = sum(x * y for x, y in zip(a, b, strict=True))
-            norm_a = math.sqrt(sum(x * x for x in a))
-            norm_b = math.sqrt(sum(x * x for x in b))
-            return dot_product / (norm_a * norm_b)
-
         text1 = "How to fix Docker memory problems"
         text2 = "Docker memory issue solutions"
         text3 = "Python list comprehension tutorial"
@@ -51,13 +93,60 @@ class TestEmbeddingManager:
         emb2 = EmbeddingManager.embed(text2)
         emb3 = EmbeddingManager.embed(text3)
 
-        sim_12 = cosine_similarity(emb1, emb2)
-        sim_13 = cosine_similarity(emb1, emb3)
+        sim_12 = _cosine_similarity(emb1, emb2)
+        sim_13 = _cosine_similarity(emb1, emb3)
 
         # Similar texts should have higher similarity
         assert sim_12 > sim_13
 
 
+class TestSerializeF32:
+    """Tests for serialize_f32."""
+
+    def test_matches_struct_layout(self) -> None:
+        """Lists and arrays should serialize to packed native float32."""
+        values = [0.5, -1.25, 3.0]
+        expected = struct.pack("3f", *values)
+        assert serialize_f32(values) == expected
+        assert serialize_f32(np.array(values, dtype=np.float32)) == expected
+        assert serialize_f32(np.array(values, dtype=np.float64)) == expected
+
+
+class TestQuantizeI8:
+    """Tests for quantize_i8."""
+
+    def test_preserves_direction(self) -> None:
+        """Quantized vectors should keep nearly the same cosine direction."""
+        v = np.random.default_rng(0).standard_normal(384).astype(np.float32)
+        q = np.frombuffer(quantize_i8(v), dtype=np.int8).astype(np.float32)
+
+        assert len(q) == 384
+        assert np.abs(q).max() == 127
+        cosine = float(v @ q / (np.linalg.norm(v) * np.linalg.norm(q)))
+        assert cosine > 0.999
+
+    def test_zero_vector(self) -> None:
+        """A zero vector should quantize to zeros rather than dividing by zero."""
+        assert quantize_i8([0.0, 0.0]) == b"\x00\x00"
+
+
+class TestEmbedQuery:
+    """Tests for embed_query."""
+
+    def test_caches_serialized_embedding(self) -> None:
+        """Repeat queries should reuse the cached embedding."""
+        embed_query.cache_clear()
+        query = "How do I fix a Docker memory issue?"
+
+        with patch.object(EmbeddingManager, "embed", wraps=EmbeddingManager.embed) as spy:
+            first = embed_query(query)
+            second = embed_query(query)
+
+        assert first == serialize_f32(EmbeddingManager.embed(query))
+        assert second is first
+        assert spy.call_count == 1
+
+
 class TestSearchResult:
     """Tests for SearchResult dataclass."""
 
@@ -112,6 +201,15 @@ class TestSqliteVecManager:
         assert stats["points_count"] == 0
         manager.close()
 
+    def test_connection_pragmas(self, tmp_path: Path) -> None:
+        """Connections should use WAL with relaxed sync for bulk inserts."""
+        manager = SqliteVecManager(tmp_path / "vectors.db")
+        conn = manager.conn
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+        assert conn.execute("PRAGMA temp_store").fetchone()[0] == 2  # MEMORY
+        manager.close()
+
     def test_index_and_search(self, tmp_path: Path) -> None:
         """Should index messages and search them."""
         manager = SqliteVecManager(tmp_path / "vectors.db")
@@ -137,6 +235,29 @@ class TestSqliteVecManager:
         assert results[0].uuid == "test-001"
         manager.close()
 
+    def test_search_with_vector(self, tmp_path: Path) -> None:
+        """A precomputed query embedding should give the same results as search."""
+        manager = SqliteVecManager(tmp_path / "vectors.db")
+        assert manager.search_with_vector(EmbeddingManager.embed("anything")) == []
+
+        messages = [
+            IndexableMessage(
+                uuid="test-001",
+                role="user",
+                content="How do I configure Docker containers?",
+                timestamp="2025-01-15T10:00:00Z",
+                session_id="session-test",
+                file_path="/test/file.jsonl",
+                line_number=1,
+                byte_offset=0,
+            ),
+        ]
+        manager.index_messages(messages)
+
+        query_embedding = EmbeddingManager.embed("Docker configuration")
+        assert manager.search_with_vector(query_embedding) == manager.search("Docker configuration")
+        manager.close()
+
     def test_get_collection_stats(self, tmp_path: Path) -> None:
         """Should return correct stats."""
         manager = SqliteVecManager(tmp_path / "vectors.db")
@@ -200,6 +321,220 @@ class TestSqliteVecManager:
         assert stats["points_count"] == 1
         manager.close()
 
+    def test_duplicate_contents_embedded_once(self, tmp_path: Path) -> None:
+        """Repeated texts should share one embedding but each get a row."""
+        manager = SqliteVecManager(tmp_path / "vectors.db")
+
+        messages = [
+            IndexableMessage(
+                uuid=f"test-{i:03d}",
+                role="user",
+                content="Same boilerplate" if i % 2 else f"Unique message {i}",
+                timestamp="2025-01-15T10:00:00Z",
+                session_id="session-test",
+                file_path="/test/file.jsonl",
+                line_number=i,
+                byte_offset=i * 100,
+            )
+            for i in range(6)
+        ]
+
+        with patch.object(
+            EmbeddingManager, "iter_embed_batch", wraps=EmbeddingManager.iter_embed_batch
+        ) as spy:
+            assert manager.index_messages(messages) == 6
+
+        assert spy.call_args.args[0] == [
+            "Unique message 0",
+            "Same boilerplate",
+            "Unique message 2",
+            "Unique message 4",
+        ]
+        assert manager.get_collection_stats()["points_count"] == 6
+        manager.close()
+
+    def test_texts_embedded_shortest_first(self, tmp_path: Path) -> None:
+        """Texts are embedded in length order but each row keeps its own vector."""
+        manager = SqliteVecManager(tmp_path / "vectors.db")
+
+        contents = [
+            "How do I set up SSL certificates for an nginx reverse proxy?",
+            "Docker",
+            "Python virtual environments",
+        ]
+        messages = [
+            IndexableMessage(
+                uuid=f"test-{i:03d}",
+                role="user",
+                content=content,
+                timestamp="2025-01-15T10:00:00Z",
+                session_id="session-test",
+                file_path="/test/file.jsonl",
+                line_number=i,
+                byte_offset=i * 100,
+            )
+            for i, content in enumerate(contents)
+        ]
+
+        with patch.object(
+            EmbeddingManager, "iter_embed_batch", wraps=EmbeddingManager.iter_embed_batch
+        ) as spy:
+            assert manager.index_messages(messages) == 3
+
+        assert spy.call_args.args[0] == sorted(contents, key=len)
+        for i, content in enumerate(contents):
+            results = manager.search_with_vector(EmbeddingManager.embed(content), limit=1)
+            assert results[0].uuid == f"test-{i:03d}"
+            assert results[0].score > 0.99
+        manager.close()
+
+    def test_index_rolls_back_on_error(self, tmp_path: Path) -> None:
+        """A failure partway through a batch should leave no rows behind."""
+        manager = SqliteVecManager(tmp_path / "vectors.db")
+
+        messages = [
+            IndexableMessage(
+                uuid=f"test-{i:03d}",
+                role="user",
+                content=f"Test message number {i}",
+                timestamp="2025-01-15T10:00:00Z",
+                session_id="session-test",
+                file_path="/test/file.jsonl",
+                line_number=i,
+                byte_offset=i * 100,
+            )
+            for i in range(3)
+        ]
+
+        def failing_embed(texts: list[str]) -> Iterator[np.ndarray]:
+            yield np.zeros(384, dtype=np.float32)
+            raise RuntimeError("embedding failed")
+
+        with (
+            patch.object(EmbeddingManager, "iter_embed_batch", side_effect=failing_embed),
+            pytest.raises(RuntimeError),
+        ):
+            manager.index_messages(messages)
+
+        assert manager.get_collection_stats()["points_count"] == 0
+        manager.close()
+
+    def test_index_error_after_sqlite_rollback(self, tmp_path: Path) -> None:
+        """The original error should surface if SQLite already rolled back."""
+        manager = SqliteVecManager(tmp_path / "vectors.db")
+
+        messages = [
+            IndexableMessage(
+                uuid=f"test-{i:03d}",
+                role="user",
+                content=f"Test message number {i}",
+                timestamp="2025-01-15T10:00:00Z",
+                session_id="session-test",
+                file_path="/test/file.jsonl",
+                line_number=i,
+                byte_offset=i * 100,
+            )
+            for i in range(3)
+        ]
+
+        # Cap the database at its current size so the insert fails with
+        # SQLITE_FULL, which makes SQLite roll the transaction back itself
+        manager.ensure_collection()
+        page_count = manager.conn.execute("PRAGMA page_count").fetchone()[0]
+        manager.conn.execute(f"PRAGMA max_page_count = {page_count}")
+
+        with pytest.raises(sqlite3.OperationalError) as excinfo:
+            manager.index_messages(messages)
+
+        assert "no transaction is active" not in str(excinfo.value)
+        assert not manager.conn.in_transaction
+        assert manager.get_collection_stats()["points_count"] == 0
+        manager.close()
+
+    def test_embedding_does_not_hold_write_lock(self, tmp_path: Path) -> None:
+        """Another writer should get the lock while a batch is being embedded."""
+        manager = SqliteVecManager(tmp_path / "vectors.db")
+        other = SqliteVecManager(tmp_path / "vectors.db")
+        manager.ensure_collection()
+        other.conn.execute("PRAGMA busy_timeout = 0")
+
+        messages = [
+            IndexableMessage(
+                uuid=f"test-{i:03d}",
+                role="user",
+                content=f"Test message number {i}",
+                timestamp="2025-01-15T10:00:00Z",
+                session_id="session-test",
+                file_path="/test/file.jsonl",
+                line_number=i,
+                byte_offset=i * 100,
+            )
+            for i in range(3)
+        ]
+        real_embed = EmbeddingManager.iter_embed_batch
+
+        def embed_while_other_writes(texts: list[str]) -> Iterator[np.ndarray]:
+            for embedding in real_embed(texts):
+                # Fails at once with "database is locked" if the lock is held
+                other.conn.execute("BEGIN IMMEDIATE")
+                other.conn.execute("COMMIT")
+                yield embedding
+
+        with patch.object(
+            EmbeddingManager, "iter_embed_batch", side_effect=embed_while_other_writes
+        ):
+            assert manager.index_messages(messages) == 3
+
+        assert other.get_collection_stats()["points_count"] == 3
+        other.close()
+        manager.close()
+
+    def test_legacy_float_table(self, tmp_path: Path) -> None:
+        """Databases created with a float32 column should still index and search."""
+        manager = SqliteVecManager(tmp_path / "vectors.db")
+        manager.conn.execute("""
+            CREATE VIRTUAL TABLE "vectors" USING vec0(
+                embedding float[384] distance_metric=cosine,
+                +uuid TEXT,
+                +file_path TEXT,
+                +line_number INTEGER,
+                +role TEXT,
+                +snippet TEXT,
+                +timestamp TEXT,
+                +session_id TEXT
+            )
+        """)
+
+        messages = [
+            IndexableMessage(
+                uuid="test-001",
+                role="user",
+                content="How do I configure Docker containers?",
+                timestamp="2025-01-15T10:00:00Z",
+                session_id="session-test",
+                file_path="/test/file.jsonl",
+                line_number=1,
+                byte_offset=0,
+            ),
+        ]
+        manager.index_messages(messages)
+
+        results = manager.search("Docker configuration")
+        assert [r.uuid for r in results] == ["test-001"]
+        manager.close()
+
+    def test_table_created_by_other_connection(self, tmp_path: Path) -> None:
+        """A missing table shouldn't be cached, so later creation is seen."""
+        reader = SqliteVecManager(tmp_path / "vectors.db")
+        assert reader.get_collection_stats()["status"] == "not_found"
+
+        writer = SqliteVecManager(tmp_path / "vectors.db")
+        writer.ensure_collection()
+        writer.close()
+
+        assert reader.get_collection_stats()["status"] == "ok"
+        reader.close()
+
     def test_search_score_threshold(self, tmp_path: Path) -> None:
         """Should filter results below score threshold."""
         manager = SqliteVecManager(tmp_path / "vectors.db")
@@ -228,6 +563,35 @@ class TestSqliteVecManager:
         assert len(results_high) <= len(results_low)
         manager.close()
 
+    def test_search_threshold_bounds(self, tmp_path: Path) -> None:
+        """Every result should meet the threshold, and none can exceed a score of 1."""
+        manager = SqliteVecManager(tmp_path / "vectors.db")
+
+        messages = [
+            IndexableMessage(
+                uuid=f"test-{i:03d}",
+                role="user",
+                content=text,
+                timestamp="2025-01-15T10:00:00Z",
+                session_id="session-test",
+                file_path="/test/file.jsonl",
+                line_number=i,
+                byte_offset=i * 100,
+            )
+            for i, text in enumerate(
+                ["Docker container memory limits", "Baking sourdough bread", "Git rebase"]
+            )
+        ]
+        manager.index_messages(messages)
+
+        assert len(manager.search("Docker memory", limit=3, score_threshold=-1.0)) == 3
+        assert manager.search("Docker memory", limit=3, score_threshold=1.01) == []
+
+        results = manager.search("Docker memory", limit=3, score_threshold=0.3)
+        assert all(r.score >= 0.3 for r in results)
+        assert [r.score for r in results] == sorted((r.score for r in results), reverse=True)
+        manager.close()
+
     def test_empty_index(self, tmp_path: Path) -> None:
         """Should return empty results from empty index."""
         manager = SqliteVecManager(tmp_path / "vectors.db")
@@ -243,3 +607,42 @@ class TestSqliteVecManager:
         count = manager.index_messages([])
         assert count == 0
         manager.close()
+
+
+class TestGetEmbeddingModelName:
+    """Tests for get_embedding_model_name."""
+
+    def test_default_model(self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Should fall back to the default model without config."""
+        monkeypatch.delenv("REFLECTIONS_EMBEDDING_MODEL", raising=False)
+        monkeypatch.setenv("REFLECTIONS_STATE_DIR", str(tmp_path))
+        assert get_embedding_model_name() == EMBEDDING_MODEL
+
+    def test_config_override(self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Should use the model named in config.json."""
+        (tmp_path / "config.json").write_text(
+            json.dumps({"embedding_model": QUANTIZED_EMBEDDING_MODEL})
+        )
+        monkeypatch.delenv("REFLECTIONS_EMBEDDING_MODEL", raising=False)
+        monkeypatch.setenv("REFLECTIONS_STATE_DIR", str(tmp_path))
+        assert get_embedding_model_name() == QUANTIZED_EMBEDDING_MODEL
+
+    def test_env_override(self, tmp_path: Path) -> None:
+        """The environment variable should take precedence over config.json."""
+        (tmp_path / "config.json").write_text(json.dumps({"embedding_model": EMBEDDING_MODEL}))
+        env = {
+            "REFLECTIONS_STATE_DIR": str(tmp_path),
+            "REFLECTIONS_EMBEDDING_MODEL": QUANTIZED_EMBEDDING_MODEL,
+        }
+        with patch.dict(os.environ, env):
+            assert get_embedding_model_name() == QUANTIZED_EMBEDDING_MODEL
+
+    def test_rejects_wrong_dimension(self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Models with a different dimension can't share the vector table."""
+        (tmp_path / "config.json").write_text(
+            json.dumps({"embedding_model": "BAAI/bge-base-en-v1.5"})
+        )
+        monkeypatch.delenv("REFLECTIONS_EMBEDDING_MODEL", raising=False)
+        monkeypatch.setenv("REFLECTIONS_STATE_DIR", str(tmp_path))
+        with pytest.raises(ValueError, match="dimension"):
+            get_embedding_model_name()
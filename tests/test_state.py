@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+import os
 from pathlib import Path
 
 from claude_reflections.state import FileState, ProjectState, StateManager
@@ -102,6 +103,60 @@ class TestStateManager:
         assert loaded.files["conv.jsonl"].last_byte_offset == 500
         assert loaded.files["conv.jsonl"].indexed_count == 25
 
+    def test_save_leaves_no_temp_files(self, state_dir: Path) -> None:
+        """Saving should replace state.json without leaving temp files behind."""
+        manager = StateManager(state_dir)
+        manager.save("test-project", ProjectState(collection_name="first"))
+        manager.save("test-project", ProjectState(collection_name="second"))
+
+        project_dir = state_dir / "test-project"
+        assert sorted(p.name for p in project_dir.iterdir()) == ["state.json"]
+        assert manager.load("test-project").collection_name == "second"
+
+    def test_save_uses_umask_mode(self, state_dir: Path) -> None:
+        """Saved state should get the usual umask-derived mode, not the 0600 of a private temp file."""
+        manager = StateManager(state_dir)
+        old_umask = os.umask(0o022)
+        try:
+            manager.save("test-project", ProjectState(collection_name="first"))
+        finally:
+            os.umask(old_umask)
+
+        state_file = state_dir / "test-project" / "state.json"
+        assert state_file.stat().st_mode & 0o777 == 0o644
+
+    def test_load_is_cached(self, state_dir: Path) -> None:
+        """Repeat loads should reuse the parsed state until the file changes."""
+        manager = StateManager(state_dir)
+        manager.update_file_state("project", "file.jsonl", 100, 10)
+
+        first = manager.load("project")
+        assert manager.load("project") is first
+
+        # A write from another manager (or process) is picked up
+        other = StateManager(state_dir)
+        other.update_file_state("project", "file.jsonl", 2000, 5)
+        reloaded = manager.load("project")
+        assert reloaded is not first
+        assert reloaded.files["file.jsonl"].last_byte_offset == 2000
+
+    def test_load_sees_same_size_rewrite(self, state_dir: Path) -> None:
+        """A replaced state file with the same size and mtime should be reread."""
+        manager = StateManager(state_dir)
+        manager.update_file_state("project", "file.jsonl", 100, 10)
+        assert manager.load("project").files["file.jsonl"].last_byte_offset == 100
+
+        # Another process renames in a same-length rewrite within one mtime tick
+        state_file = state_dir / "project" / "state.json"
+        st = state_file.stat()
+        replacement = state_file.with_name("replacement.json")
+        replacement.write_bytes(state_file.read_bytes().replace(b": 100,", b": 900,"))
+        os.utime(replacement, ns=(st.st_atime_ns, st.st_mtime_ns))
+        os.replace(replacement, state_file)
+        assert state_file.stat().st_size == st.st_size
+
+        assert manager.load("project").files["file.jsonl"].last_byte_offset == 900
+
     def test_update_file_state(self, state_dir: Path) -> None:
         """Should update file state incrementally."""
         manager = StateManager(state_dir)
@@ -118,6 +173,24 @@ class TestStateManager:
         assert state.files["file.jsonl"].last_byte_offset == 200
         assert state.files["file.jsonl"].indexed_count == 15  # 10 + 5
 
+    def test_apply_file_delta(self, state_dir: Path) -> None:
+        """Should update an in-memory state without touching disk."""
+        manager = StateManager(state_dir)
+        state = manager.load("project1")
+
+        manager.apply_file_delta(state, "a.jsonl", 100, 10, line_number=4)
+        manager.apply_file_delta(state, "b.jsonl", 50, 2)
+        manager.apply_file_delta(state, "a.jsonl", 200, 5, line_number=9)
+
+        assert not (state_dir / "project1" / "state.json").exists()
+        assert state.files["a.jsonl"].last_byte_offset == 200
+        assert state.files["a.jsonl"].indexed_count == 15
+        assert state.files["a.jsonl"].last_line_number == 9
+        assert state.files["b.jsonl"].indexed_count == 2
+
+        manager.save("project1", state)
+        assert manager.get_file_offset("project1", "b.jsonl") == 50
+
     def test_get_file_offset(self, state_dir: Path) -> None:
         """Should get file offset or 0 if not found."""
         manager = StateManager(state_dir)
@@ -30,5 +30,6 @@ echo "Uninstall complete."
 echo ""
 echo "To complete removal:"
 echo "  1. Restart Claude Code to unload the plugin"
-echo "  2. Optionally remove embedding model cache: rm -rf ~/.cache/fastembed"
+echo "  2. Optionally remove embedding model cache: rm -rf ${CONFIG_DIR}/models"
+echo "     (or \$FASTEMBED_CACHE_PATH if you set it)"
 echo "  3. Optionally clean marketplace entry from ~/.claude/settings.json"